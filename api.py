@@ -7,6 +7,8 @@ Endpoints:
   GET  /health               → Service health
   GET  /model/info           → Model metadata & training metrics
   POST /observability/report → Full observability report (drift, bias, performance)
+  GET  /metrics/live         → Current live prediction metrics (one-shot)
+  GET  /metrics/stream       → Server-sent events: incremental live metrics for dashboards
 
 Run locally:
   pip install fastapi uvicorn
@@ -16,13 +18,16 @@ Deploy:
   Docker / Render / Railway / AWS ECS — see Dockerfile
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional
 import pandas as pd
 import json
 import tempfile
+import asyncio
+import time
 import os
 
 from pipeline import (
@@ -35,6 +40,7 @@ from pipeline import (
     BASELINE_PATH,
     ALL_FEATURES,
 )
+from live_metrics import LIVE_METRICS, BROADCASTER, format_sse
 
 app = FastAPI(
     title="Loan Approval ML API",
@@ -98,22 +104,30 @@ def model_info():
 
 @app.post("/predict")
 def predict_single(app_data: LoanApplication):
+    start = time.perf_counter()
     try:
-        result = predict(app_data.model_dump())
+        record = app_data.model_dump()
+        result = predict(record)
+        LIVE_METRICS.record("/predict", (time.perf_counter() - start) * 1000, [result], [record])
         return result
     except FileNotFoundError as e:
+        LIVE_METRICS.record_error()
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
+        LIVE_METRICS.record_error()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/predict/batch")
 def predict_batch_endpoint(batch: BatchRequest):
+    start = time.perf_counter()
     try:
         records = [a.model_dump() for a in batch.applications]
         results = predict_batch(records)
+        LIVE_METRICS.record("/predict/batch", (time.perf_counter() - start) * 1000, results, records)
         return {"count": len(results), "predictions": results}
     except Exception as e:
+        LIVE_METRICS.record_error()
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -158,6 +172,42 @@ def get_baseline():
         return json.load(f)
 
 
+@app.get("/metrics/live")
+async def metrics_live():
+    """Current live metrics (same payload as the stream's full snapshot)."""
+    return BROADCASTER.latest_snapshot()
+
+
+@app.get("/metrics/stream")
+async def metrics_stream(request: Request):
+    """
+    Server-sent events for dashboards. Emits:
+      - snapshot : full metrics (on connect, and after a slow client is resynced)
+      - update   : only the fields that changed since the previous tick
+    Metrics are computed once per tick and shared by all subscribers, and
+    aggregate every worker unless the payload says "per_process": true.
+    """
+    async def events():
+        # Subscribe inside the generator so a client that disconnects before
+        # the body starts streaming never registers (and never leaks).
+        sub = BROADCASTER.subscribe()
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(sub.queue.get(), timeout=5)
+                except asyncio.TimeoutError:
+                    continue
+                yield format_sse(event, data)
+        finally:
+            BROADCASTER.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/model/summary")
 def model_summary():
     """Dashboard-ready model summary: metrics, feature importances, confusion matrix."""
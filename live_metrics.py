@@ -0,0 +1,368 @@
+"""
+Live Metrics — prediction stats pushed to dashboards over SSE
+==============================================================
+  - Predict endpoints call LIVE_METRICS.record(...) (cheap, lock-protected append)
+  - Every worker process publishes its rolling window to a shared directory
+    once per tick, so a snapshot covers all uvicorn workers, not just the one
+    holding the SSE connection
+  - One background tick computes a snapshot for all subscribers:
+      prediction counts, approval rate, per-endpoint latency percentiles,
+      drift flags (recent inputs vs baseline), model version
+  - Subscribers receive only the fields that changed since the last tick
+  - Each subscriber has a small bounded queue; a slow consumer has its backlog
+    dropped and is resynced with a full snapshot instead of blocking the tick
+
+Cost therefore scales with the tick rate, not with the number of clients.
+Totals cover live workers only: a restarted worker starts again from zero.
+If the shared directory is not writable, snapshots fall back to the serving
+process alone and carry "per_process": true — dashboards must not treat
+those numbers as global totals.
+"""
+
+import os
+import time
+import json
+import asyncio
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from collections import deque
+from pathlib import Path
+
+from pipeline import (
+    compute_psi,
+    compute_numerical_drift,
+    METADATA_PATH,
+    BASELINE_PATH,
+    NUMERICAL_FEATURES,
+    CATEGORICAL_FEATURES,
+)
+
+
+TICK_SECONDS      = 2.0     # snapshot / fan-out / publish interval
+WINDOW_SECONDS    = 300     # rolling window for rates and percentiles
+WINDOW_MAX_EVENTS = 5000    # hard cap on the rolling window
+DRIFT_MIN_SAMPLES = 30      # minimum recent inputs before drift is evaluated
+EXPORT_MAX_INPUTS = 1000    # most recent inputs each worker shares for drift
+SUBSCRIBER_QUEUE  = 8       # messages buffered per client before dropping
+HEARTBEAT_SECONDS = 15      # SSE comment to keep idle connections open
+
+# uvicorn/gunicorn workers share a parent, so key the directory on it
+SHARED_DIR = Path(os.environ.get(
+    "LIVE_METRICS_DIR",
+    Path(tempfile.gettempdir()) / f"loan-api-live-metrics-{os.getppid()}",
+))
+
+
+class LiveMetrics:
+    """Thread-safe rolling window of recent predictions (sync routes run in a threadpool)."""
+
+    def __init__(self, shared_dir: Path | None = SHARED_DIR):
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=WINDOW_MAX_EVENTS)    # (ts, endpoint, latency_ms, n, n_approved)
+        self._inputs = deque(maxlen=WINDOW_MAX_EVENTS)    # (ts, input dict)
+        self._total_predictions = 0
+        self._total_approved = 0
+        self._total_requests = 0
+        self._total_errors = 0
+        self._seq = 0    # bumped on every record, lets the tick skip idle work
+        self._shared_dir = shared_dir
+        self._publisher: threading.Thread | None = None
+        self.shared = shared_dir is not None
+
+    def record(self, endpoint: str, latency_ms: float, results: list[dict], inputs: list[dict]):
+        now = time.time()
+        n_approved = sum(1 for r in results if r.get("approved"))
+        with self._lock:
+            self._events.append((now, endpoint, latency_ms, len(results), n_approved))
+            for rec in inputs:
+                self._inputs.append((now, rec))
+            self._total_predictions += len(results)
+            self._total_approved += n_approved
+            self._total_requests += 1
+            self._seq += 1
+        self._ensure_publisher()
+
+    def record_error(self):
+        with self._lock:
+            self._total_errors += 1
+            self._seq += 1
+        self._ensure_publisher()
+
+    def window(self) -> dict:
+        """Prune to WINDOW_SECONDS and return a copy of this process's state."""
+        cutoff = time.time() - WINDOW_SECONDS
+        with self._lock:
+            while self._events and self._events[0][0] < cutoff:
+                self._events.popleft()
+            while self._inputs and self._inputs[0][0] < cutoff:
+                self._inputs.popleft()
+            return {
+                "pid":    os.getpid(),
+                "seq":    self._seq,
+                "events": list(self._events),
+                "inputs": list(self._inputs),
+                "totals": {
+                    "predictions": self._total_predictions,
+                    "approved":    self._total_approved,
+                    "requests":    self._total_requests,
+                    "errors":      self._total_errors,
+                },
+            }
+
+    # ── cross-worker sharing ──────────────────────
+    def _ensure_publisher(self):
+        if not self.shared or (self._publisher and self._publisher.is_alive()):
+            return
+        with self._lock:
+            if self._publisher and self._publisher.is_alive():
+                return
+            self._publisher = threading.Thread(target=self._publish_loop, daemon=True)
+            self._publisher.start()
+
+    def _publish_loop(self):
+        published_seq = None
+        path = self._shared_dir / f"{os.getpid()}.json"
+        while True:
+            state = self.window()
+            if state["seq"] != published_seq:
+                state["inputs"] = state["inputs"][-EXPORT_MAX_INPUTS:]
+                try:
+                    self._shared_dir.mkdir(parents=True, exist_ok=True)
+                    tmp = path.with_suffix(".tmp")
+                    with open(tmp, "w") as f:
+                        json.dump(state, f, default=str)
+                    os.replace(tmp, path)    # atomic: readers never see a partial file
+                    published_seq = state["seq"]
+                except OSError:
+                    self.shared = False
+                    return
+            time.sleep(TICK_SECONDS)
+
+    def peer_states(self) -> list[dict]:
+        """Published state of every other live worker sharing the directory."""
+        if not self.shared or not self._shared_dir.is_dir():
+            return []
+        states = []
+        for path in self._shared_dir.glob("*.json"):
+            pid = int(path.stem) if path.stem.isdigit() else None
+            if pid is None or pid == os.getpid():
+                continue
+            if not _pid_alive(pid):
+                path.unlink(missing_ok=True)    # worker exited; its totals leave the aggregate
+                continue
+            try:
+                with open(path) as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return states
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+LIVE_METRICS = LiveMetrics()
+
+
+# ══════════════════════════════════════════════
+# SNAPSHOT  (computed once per tick)
+# ══════════════════════════════════════════════
+def _latency_percentiles(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2), "p99": round(float(p99), 2)}
+
+
+def _latency_by_endpoint(events: list) -> dict:
+    """Per-endpoint percentiles — a batch call and a single prediction are not comparable samples."""
+    by_endpoint = {}
+    for _, endpoint, latency_ms, _, _ in events:
+        by_endpoint.setdefault(endpoint, []).append(latency_ms)
+    return {endpoint: _latency_percentiles(lat) for endpoint, lat in sorted(by_endpoint.items())}
+
+
+def _drift_flags(inputs: list[dict], baseline: dict | None) -> dict:
+    if baseline is None or len(inputs) < DRIFT_MIN_SAMPLES:
+        return {}
+    df = pd.DataFrame(inputs)
+    flags = {}
+    for col in NUMERICAL_FEATURES:
+        if col in df and col in baseline:
+            flags[col] = compute_numerical_drift(baseline, df[col], col)["drift_detected"]
+    for col in CATEGORICAL_FEATURES:
+        if col in df and col in baseline:
+            current_dist = df[col].value_counts(normalize=True).to_dict()
+            flags[col] = bool(compute_psi(baseline[col]["distribution"], current_dist) > 0.1)
+    return flags
+
+
+class _ModelVersion:
+    """Tracks the trained model via metadata mtime; reloads baseline only when it changes."""
+
+    def __init__(self):
+        self._mtime = None
+        self.version = None
+        self.baseline = None
+
+    def refresh(self):
+        mtime = METADATA_PATH.stat().st_mtime if METADATA_PATH.exists() else None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        self.version = None
+        self.baseline = None
+        if mtime is not None:
+            with open(METADATA_PATH) as f:
+                self.version = json.load(f).get("trained_at")
+        if BASELINE_PATH.exists():
+            with open(BASELINE_PATH) as f:
+                self.baseline = json.load(f)
+
+
+# ══════════════════════════════════════════════
+# FAN-OUT
+# ══════════════════════════════════════════════
+class _Subscriber:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+        self.dropped = 0
+
+
+class MetricsBroadcaster:
+    """
+    Computes one snapshot per tick and fans it out to every SSE subscriber.
+    The tick task runs only while at least one client is connected.
+    """
+
+    def __init__(self, metrics: LiveMetrics):
+        self._metrics = metrics
+        self._model = _ModelVersion()
+        self._subscribers: set[_Subscriber] = set()
+        self._task: asyncio.Task | None = None
+        self._snapshot: dict = {}
+        self._snapshot_at = 0.0
+        self._polled: dict = {}       # snapshot served to /metrics/live while no tick is running
+        self._polled_at = 0.0
+        self._drift_key = None        # (per-worker seqs, window size, model version) of the drift flags
+        self._drift: dict = {}
+
+    @property
+    def snapshot(self) -> dict:
+        return self._snapshot
+
+    def latest_snapshot(self) -> dict:
+        """
+        Snapshot for one-shot polling: reuse the tick's snapshot while it is
+        fresh, otherwise compute at most one per TICK_SECONDS.
+        """
+        now = time.monotonic()
+        if self._snapshot and now - self._snapshot_at <= 2 * TICK_SECONDS:
+            return self._snapshot
+        if not self._polled or now - self._polled_at > TICK_SECONDS:
+            self._polled, self._polled_at = self.compute_snapshot(), now
+        return self._polled
+
+    def subscribe(self) -> _Subscriber:
+        sub = _Subscriber()
+        if self._snapshot:
+            sub.queue.put_nowait(("snapshot", {**self._snapshot, "ts": time.time()}))
+        self._subscribers.add(sub)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber):
+        self._subscribers.discard(sub)
+
+    def compute_snapshot(self) -> dict:
+        local = self._metrics.window()
+        states = [local] + self._metrics.peer_states()
+        self._model.refresh()
+
+        cutoff = time.time() - WINDOW_SECONDS
+        events = [e for s in states for e in s["events"] if e[0] >= cutoff]
+        inputs = [rec for s in states for ts, rec in s["inputs"] if ts >= cutoff]
+        totals = {k: sum(s["totals"][k] for s in states) for k in local["totals"]}
+
+        # Drift is the only non-trivial step; skip it when the window is unchanged.
+        # len(inputs) is in the key so the flags follow the window as it expires.
+        seqs = tuple(sorted((s["pid"], s["seq"]) for s in states))
+        key = (seqs, len(inputs), self._model.version)
+        if len(inputs) < DRIFT_MIN_SAMPLES:
+            self._drift = {}
+            self._drift_key = None
+        elif key != self._drift_key:
+            self._drift = _drift_flags(inputs, self._model.baseline)
+            self._drift_key = key
+
+        n_window = sum(e[3] for e in events)
+        approved_window = sum(e[4] for e in events)
+        return {
+            "model_version":       self._model.version,
+            "pid":                 local["pid"],
+            "workers":             len(states),
+            "per_process":         not self._metrics.shared,
+            "predictions_total":   totals["predictions"],
+            "requests_total":      totals["requests"],
+            "errors_total":        totals["errors"],
+            "predictions_window":  n_window,
+            "approval_rate":       round(approved_window / n_window, 4) if n_window else None,
+            "latency_ms":          _latency_by_endpoint(events),
+            "drift_flags":         self._drift,
+            "any_drift_detected":  any(self._drift.values()),
+            "window_seconds":      WINDOW_SECONDS,
+        }
+
+    async def _run(self):
+        last_sent = time.monotonic()
+        while self._subscribers:
+            previous, snapshot = self._snapshot, self.compute_snapshot()
+            delta = {k: v for k, v in snapshot.items() if k not in previous or previous[k] != v}
+            self._snapshot, self._snapshot_at = snapshot, time.monotonic()
+
+            now = time.monotonic()
+            if delta:
+                event = "update" if previous else "snapshot"
+                message = (event, {**delta, "ts": time.time()})
+                last_sent = now
+            elif now - last_sent >= HEARTBEAT_SECONDS:
+                message = ("heartbeat", None)
+                last_sent = now
+            else:
+                message = None
+
+            if message is not None:
+                for sub in list(self._subscribers):
+                    self._publish(sub, message)
+
+            await asyncio.sleep(TICK_SECONDS)
+
+    def _publish(self, sub: _Subscriber, message: tuple):
+        try:
+            sub.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: discard its backlog. Deltas are no longer
+            # enough to rebuild state, so resync with a full snapshot.
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+                sub.dropped += 1
+            sub.queue.put_nowait(("snapshot", {**self._snapshot, "ts": time.time(), "dropped": sub.dropped}))
+
+
+def format_sse(event: str, data: dict | None) -> str:
+    if data is None:
+        return ": heartbeat\n\n"
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+BROADCASTER = MetricsBroadcaster(LIVE_METRICS)
@@ -0,0 +1,502 @@
+"""
+Load Testing Harness — reproducible open-loop traffic against api.py
+=====================================================================
+  - Replays recorded LoanApplication traffic (CSV / JSONL) or generates
+    synthetic applications from artifacts/baseline_stats.json (seeded)
+  - Open-loop arrivals (Poisson or constant) at a fixed offered rate;
+    latency is measured from the scheduled send time, so a saturated
+    server shows up as queueing delay instead of a slower request rate
+  - Mix of POST /predict, POST /predict/batch and POST /observability/report
+  - Optional local stand-in for the Express proxyToFastAPI hop (--via-proxy)
+  - Reports throughput, p50/p95/p99/p99.9 latency, error rate and server
+    CPU / RSS (read from /proc, Linux only); the proxy stand-in shares the
+    box, so its CPU / RSS is sampled and reported separately
+  - Sweeps worker counts x arrival rates to produce saturation curves
+
+Run:
+  python loadtest.py --workers 1,2,4 --rates 5,10,20,40 --duration 30
+  python loadtest.py --workers 2 --rates 10,20 --via-proxy --replay loan.csv
+  python loadtest.py --url http://127.0.0.1:8000 --rates 20    # existing server
+"""
+
+import os
+import io
+import sys
+import csv
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import numpy as np
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+
+BASE_DIR = Path(__file__).parent
+ARTIFACTS_DIR = BASE_DIR / "artifacts"
+BASELINE_PATH = ARTIFACTS_DIR / "baseline_stats.json"
+REPORT_PATH   = ARTIFACTS_DIR / "loadtest_report.json"
+
+ENDPOINTS = ["/predict", "/predict/batch", "/observability/report"]
+
+# Routes the Express server actually proxies; the observability upload is
+# never sent through proxyToFastAPI, so it always goes direct.
+PROXIED_ENDPOINTS = {"/predict", "/predict/batch"}
+
+# LoanApplication bounds (see api.py) — synthetic values are clipped to these
+FIELD_BOUNDS = {
+    "age":          (18, 100),
+    "income":       (0, None),
+    "credit_score": (300, 850),
+}
+INT_FIELDS = {"age", "credit_score"}
+
+
+# ══════════════════════════════════════════════
+# 1.  TRAFFIC
+# ══════════════════════════════════════════════
+def _normalize_record(row: dict) -> dict:
+    """Same column clean-up as pipeline.load_data, minus the target, with numeric casts."""
+    row = {str(k).strip().lower().replace(" ", "_"): v for k, v in row.items()}
+    row.pop("loan_status", None)
+    for col in FIELD_BOUNDS:
+        if row.get(col) not in (None, ""):
+            row[col] = int(float(row[col])) if col in INT_FIELDS else float(row[col])
+    return row
+
+
+def load_records(path: str) -> list[dict]:
+    """Recorded applications from a CSV (training schema) or JSONL file."""
+    path = Path(path)
+    with open(path, newline="") as f:
+        if path.suffix == ".jsonl":
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    return [_normalize_record(row) for row in rows]
+
+
+def synthetic_records(n: int, rng: np.random.Generator, baseline_path: Path = BASELINE_PATH) -> list[dict]:
+    """Sample applications feature-by-feature from the training baseline stats."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    records = [{} for _ in range(n)]
+    for col, stats in baseline.items():
+        if "distribution" in stats:
+            cats = list(stats["distribution"])
+            probs = np.array(list(stats["distribution"].values()), dtype=float)
+            values = rng.choice(cats, size=n, p=probs / probs.sum())
+            values = [str(v) for v in values]
+        else:
+            lo, hi = FIELD_BOUNDS.get(col, (None, None))
+            lo = max(stats["min"], lo) if lo is not None else stats["min"]
+            hi = min(stats["max"], hi) if hi is not None else stats["max"]
+            values = np.clip(rng.normal(stats["mean"], stats["std"], size=n), lo, hi)
+            values = [int(round(v)) if col in INT_FIELDS else round(float(v), 2) for v in values]
+        for rec, v in zip(records, values):
+            rec[col] = v
+    return records
+
+
+def records_to_csv(records: list[dict]) -> bytes:
+    buf = io.StringIO()
+    fieldnames = list(dict.fromkeys(k for rec in records for k in rec))    # rows may differ in keys
+    writer = csv.DictWriter(buf, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(records)
+    return buf.getvalue().encode()
+
+
+def build_schedule(rate: float, duration: float, rng: np.random.Generator, arrival: str) -> np.ndarray:
+    """Send offsets (seconds from step start) for an open-loop arrival process."""
+    if arrival == "constant":
+        return np.arange(0, duration, 1.0 / rate)
+    n_expected = int(rate * duration * 1.5) + 10
+    offsets = np.cumsum(rng.exponential(1.0 / rate, size=n_expected))
+    return offsets[offsets < duration]
+
+
+def build_requests(schedule, records, mix, batch_size, report_rows, rng) -> list[tuple]:
+    """
+    Pre-build every request of a step as (offset, endpoint, httpx kwargs) so no
+    payload work happens inside the timed send loop.
+    """
+    weights = np.array([mix[e] for e in ENDPOINTS], dtype=float)
+    choices = rng.choice(len(ENDPOINTS), size=len(schedule), p=weights / weights.sum())
+    cursor = int(rng.integers(len(records)))
+
+    def take(k):
+        nonlocal cursor
+        out = [records[(cursor + i) % len(records)] for i in range(k)]
+        cursor = (cursor + k) % len(records)
+        return out
+
+    requests = []
+    for offset, idx in zip(schedule, choices):
+        endpoint = ENDPOINTS[idx]
+        if endpoint == "/predict":
+            kwargs = {"json": take(1)[0]}
+        elif endpoint == "/predict/batch":
+            kwargs = {"json": {"applications": take(batch_size)}}
+        else:
+            kwargs = {"files": {"file": ("traffic.csv", records_to_csv(take(report_rows)), "text/csv")}}
+        requests.append((float(offset), endpoint, kwargs))
+    return requests
+
+
+# ══════════════════════════════════════════════
+# 2.  EXPRESS PROXY STAND-IN
+# ══════════════════════════════════════════════
+# Mirrors server/src/modules/loan/routes.js proxyToFastAPI: the JSON body is
+# parsed and re-serialised, a fresh upstream connection is opened per request,
+# the whole upstream response is buffered and re-encoded, and connection
+# failures become a 502. Started by the harness with:
+#   LOADTEST_UPSTREAM=http://127.0.0.1:<port> uvicorn loadtest:proxy_app
+_upstream_client: httpx.AsyncClient | None = None
+
+
+@asynccontextmanager
+async def _proxy_lifespan(app: FastAPI):
+    global _upstream_client
+    _upstream_client = httpx.AsyncClient(
+        base_url=os.environ.get("LOADTEST_UPSTREAM", "http://127.0.0.1:8000"),
+        limits=httpx.Limits(max_keepalive_connections=0),   # Node http.request without keep-alive agent
+        timeout=None,
+    )
+    yield
+    await _upstream_client.aclose()
+
+
+proxy_app = FastAPI(title="proxyToFastAPI stand-in", lifespan=_proxy_lifespan)
+
+
+@proxy_app.api_route("/{path:path}", methods=["GET", "POST"])
+async def _proxy(path: str, request: Request):
+    raw = await request.body()
+    body = json.dumps(json.loads(raw)) if raw else None
+    try:
+        upstream = await _upstream_client.request(
+            request.method, f"/{path}",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+    except httpx.TransportError:
+        return JSONResponse(status_code=502, content={
+            "error": "ML API unavailable",
+            "detail": f"Could not connect to FastAPI at {_upstream_client.base_url}.",
+        })
+    try:
+        return JSONResponse(status_code=upstream.status_code, content=json.loads(upstream.content))
+    except ValueError:
+        return Response(status_code=upstream.status_code, content=upstream.content)
+
+
+# ══════════════════════════════════════════════
+# 3.  SERVER PROCESSES & RESOURCE SAMPLING
+# ══════════════════════════════════════════════
+_CLK_TCK = os.sysconf("SC_CLK_TCK")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_uvicorn(app: str, port: int, workers: int = 1, env: dict | None = None) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "uvicorn", app,
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(cmd, cwd=BASE_DIR, env={**os.environ, **(env or {})})
+
+
+def wait_ready(url: str, path: str = "/health", timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url + path, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout:.0f}s.")
+
+
+def stop_process(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _proc_stat(pid: int) -> list[str] | None:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm (field 2) may contain spaces; fields after it are space separated
+    return data[data.rindex(")") + 2:].split()
+
+
+def process_tree(root_pid: int) -> list[int]:
+    """root_pid and all its descendants (uvicorn --workers spawns children)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            fields = _proc_stat(int(entry))
+            if fields:
+                children.setdefault(int(fields[1]), []).append(int(entry))
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def sample_resources(pids: list[int]) -> tuple[float, int]:
+    """(total CPU seconds, total RSS bytes) for the given processes (see process_tree)."""
+    cpu_ticks, rss_pages = 0, 0
+    for pid in pids:
+        fields = _proc_stat(pid)
+        if not fields:
+            continue
+        cpu_ticks += int(fields[11]) + int(fields[12])   # utime + stime
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                rss_pages += int(f.read().split()[1])
+        except OSError:
+            pass
+    return cpu_ticks / _CLK_TCK, rss_pages * _PAGE_SIZE
+
+
+# ══════════════════════════════════════════════
+# 4.  RUNNER
+# ══════════════════════════════════════════════
+def _percentiles_ms(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None, "p99_9": None}
+    p = np.percentile(np.array(latencies) * 1000, [50, 95, 99, 99.9])
+    return {k: round(float(v), 2) for k, v in zip(["p50", "p95", "p99", "p99_9"], p)}
+
+
+def _summarize(results: list[tuple], dropped: int, n_sent: int, wall: float) -> dict:
+    ok = [lat for _, lat, success in results if success]
+    errors = sum(1 for _, _, success in results if not success) + dropped
+    return {
+        "sent":           n_sent,
+        "completed":      len(ok),
+        "errors":         errors,
+        "dropped":        dropped,
+        "error_rate":     round(errors / n_sent, 4) if n_sent else 0.0,
+        "throughput_rps": round(len(ok) / wall, 2) if wall else 0.0,
+        "latency_ms":     _percentiles_ms(ok),
+    }
+
+
+async def run_step(requests, direct_url, proxy_url, max_inflight, timeout, monitored: dict | None = None) -> dict:
+    """
+    Fire pre-built requests on schedule (open loop) and collect stats.
+    monitored maps a report key ("server", "proxy") to the root PID whose
+    process tree is sampled for CPU / RSS.
+    """
+    loop = asyncio.get_running_loop()
+    results = []           # (endpoint, latency_s, success)
+    inflight = 0
+    dropped = {endpoint: 0 for endpoint in ENDPOINTS}    # rejected at max_inflight
+    # Resolve each process tree once; uvicorn workers live for the whole step
+    trees = {name: process_tree(pid) for name, pid in (monitored or {}).items() if pid}
+    peak_rss = {name: 0 for name in trees}
+
+    async def fire(client, endpoint, kwargs, scheduled):
+        nonlocal inflight
+        try:
+            resp = await client.post(endpoint, **kwargs)
+            success = resp.status_code < 400
+        except httpx.HTTPError:
+            success = False
+        inflight -= 1
+        results.append((endpoint, loop.time() - scheduled, success))
+
+    async def sample_rss():
+        # /proc reads run off the event loop so they never delay scheduled sends
+        while True:
+            for name, pids in trees.items():
+                _, rss = await asyncio.to_thread(sample_resources, pids)
+                peak_rss[name] = max(peak_rss[name], rss)
+            await asyncio.sleep(0.5)
+
+    limits = httpx.Limits(max_connections=max_inflight, max_keepalive_connections=max_inflight)
+    async with httpx.AsyncClient(base_url=direct_url, limits=limits, timeout=timeout) as direct, \
+               httpx.AsyncClient(base_url=proxy_url or direct_url, limits=limits, timeout=timeout) as proxied:
+        cpu_start = {name: sample_resources(pids)[0] for name, pids in trees.items()}
+        sampler = asyncio.create_task(sample_rss()) if trees else None
+
+        tasks = []
+        t0 = loop.time()
+        for offset, endpoint, kwargs in requests:
+            scheduled = t0 + offset
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if inflight >= max_inflight:
+                dropped[endpoint] += 1
+                continue
+            inflight += 1
+            client = proxied if endpoint in PROXIED_ENDPOINTS else direct
+            tasks.append(asyncio.create_task(fire(client, endpoint, kwargs, scheduled)))
+        if tasks:
+            await asyncio.wait(tasks)
+        wall = loop.time() - t0
+
+        if sampler:
+            sampler.cancel()
+        end = {name: sample_resources(pids) for name, pids in trees.items()}
+
+    step = _summarize(results, sum(dropped.values()), len(requests), wall)
+    step["wall_seconds"] = round(wall, 2)
+    step["by_endpoint"] = {
+        endpoint: _summarize(
+            [r for r in results if r[0] == endpoint], dropped[endpoint],
+            sum(1 for req in requests if req[1] == endpoint), wall,
+        )
+        for endpoint in ENDPOINTS
+        if any(req[1] == endpoint for req in requests)
+    }
+    for name, (cpu_end, rss_end) in end.items():
+        step[name] = {
+            "cpu_percent":  round((cpu_end - cpu_start[name]) / wall * 100, 1),
+            "rss_mb_peak":  round(max(peak_rss[name], rss_end) / 2**20, 1),
+            "rss_mb_end":   round(rss_end / 2**20, 1),
+        }
+    return step
+
+
+def sweep(args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    records = load_records(args.replay) if args.replay else synthetic_records(args.synthetic_size, rng)
+    mix = dict(zip(ENDPOINTS, args.mix))
+    worker_counts = ["external"] if args.url else args.workers
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "config": {
+            "url": args.url, "workers": "external" if args.url else args.workers, "rates": args.rates,
+            "duration": args.duration, "arrival": args.arrival, "mix": mix,
+            "batch_size": args.batch_size, "report_rows": args.report_rows,
+            "via_proxy": args.via_proxy, "replay": args.replay,
+            "n_records": len(records), "seed": args.seed,
+            "max_inflight": args.max_inflight, "cpu_count": os.cpu_count(),
+        },
+        "runs": [],
+    }
+
+    for workers in worker_counts:
+        server = proxy = None
+        try:
+            if args.url:
+                direct_url, server_pid = args.url.rstrip("/"), args.server_pid
+            else:
+                port = free_port()
+                server = start_uvicorn("api:app", port, workers)
+                direct_url, server_pid = f"http://127.0.0.1:{port}", server.pid
+            wait_ready(direct_url)
+
+            proxy_url = None
+            if args.via_proxy:
+                proxy_port = free_port()
+                proxy = start_uvicorn("loadtest:proxy_app", proxy_port, env={"LOADTEST_UPSTREAM": direct_url})
+                proxy_url = f"http://127.0.0.1:{proxy_port}"
+                wait_ready(proxy_url)
+
+            # Warm up model loading / connection setup outside the measured steps
+            for rec in records[:max(args.warmup, 0)]:
+                httpx.post((proxy_url or direct_url) + "/predict", json=rec, timeout=args.timeout)
+
+            for rate in args.rates:
+                step_rng = np.random.default_rng([args.seed, int(rate * 1000)])
+                schedule = build_schedule(rate, args.duration, step_rng, args.arrival)
+                requests = build_requests(schedule, records, mix, args.batch_size, args.report_rows, step_rng)
+                step = asyncio.run(run_step(
+                    requests, direct_url, proxy_url, args.max_inflight, args.timeout,
+                    {"server": server_pid, "proxy": proxy.pid if proxy else None},
+                ))
+                step.update({"workers": workers, "offered_rps": rate})
+                report["runs"].append(step)
+                _print_step(step)
+        finally:
+            if proxy:
+                stop_process(proxy)
+            if server:
+                stop_process(server)
+
+    return report
+
+
+# ══════════════════════════════════════════════
+# 5.  REPORT
+# ══════════════════════════════════════════════
+def _print_step(step: dict):
+    lat = step["latency_ms"]
+    server = step.get("server", {})
+    proxy = step.get("proxy", {})
+    fmt = lambda v: "-" if v is None else f"{v:.1f}"
+    print(f"  {str(step['workers']):>8}  {step['offered_rps']:>7.1f}  {step['throughput_rps']:>7.1f}"
+          f"  {fmt(lat['p50']):>8}  {fmt(lat['p95']):>8}  {fmt(lat['p99']):>8}  {fmt(lat['p99_9']):>8}"
+          f"  {step['error_rate'] * 100:>6.2f}  {fmt(server.get('cpu_percent')):>7}  {fmt(server.get('rss_mb_peak')):>7}"
+          f"  {fmt(proxy.get('cpu_percent')):>7}")
+
+
+def _parse_list(cast):
+    return lambda s: [cast(v) for v in s.split(",") if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load test for the Loan Approval ML API")
+    parser.add_argument("--workers", type=_parse_list(int), default=[1], help="Comma-separated uvicorn worker counts")
+    parser.add_argument("--rates", type=_parse_list(float), default=[5, 10, 20], help="Comma-separated offered rates (req/s)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per rate step")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--mix", type=_parse_list(float), default=[0.8, 0.15, 0.05],
+                        help="Weights for /predict,/predict/batch,/observability/report")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--report-rows", type=int, default=50, help="Rows per /observability/report upload")
+    parser.add_argument("--replay", default=None, help="Recorded applications (.csv or .jsonl); synthetic if omitted")
+    parser.add_argument("--synthetic-size", type=int, default=1000)
+    parser.add_argument("--via-proxy", action="store_true", help="Route proxied endpoints through the Express stand-in")
+    parser.add_argument("--url", default=None, help="Target an already running API instead of starting one")
+    parser.add_argument("--server-pid", type=int, default=None, help="PID to sample CPU/RSS for when using --url")
+    parser.add_argument("--max-inflight", type=int, default=512)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured /predict calls before each worker count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=str(REPORT_PATH))
+    args = parser.parse_args()
+
+    if len(args.mix) != len(ENDPOINTS):
+        parser.error(f"--mix needs {len(ENDPOINTS)} weights")
+
+    print("=" * 106)
+    print("  LOAN APPROVAL API - LOAD TEST")
+    print("=" * 106)
+    print(f"  {'workers':>8}  {'offered':>7}  {'rps':>7}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}"
+          f"  {'p99.9 ms':>8}  {'err %':>6}  {'cpu %':>7}  {'rss MB':>7}  {'proxy %':>7}")
+
+    report = sweep(args)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[SAVE]  Load test report saved -> {args.out}")
@@ -56,6 +56,21 @@ ALL_FEATURES         = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
 TARGET               = "loan_status"
 
 
+# ──────────────────────────────────────────────
+# MODEL HYPERPARAMETERS  (defaults; tuning.py can override)
+# ──────────────────────────────────────────────
+RF_PARAMS = {
+    "n_estimators":      200,
+    "max_depth":         8,
+    "min_samples_split": 4,
+    "min_samples_leaf":  2,
+    "max_features":      "sqrt",
+    "class_weight":      "balanced",   # handles class imbalance
+    "random_state":      42,
+    "n_jobs":            -1,
+}
+
+
 # ══════════════════════════════════════════════
 # 1.  PREPROCESSING
 # ══════════════════════════════════════════════
@@ -99,7 +114,13 @@ def preprocess_data(df: pd.DataFrame):
 # ══════════════════════════════════════════════
 # 2.  TRAINING
 # ══════════════════════════════════════════════
-def train(csv_path: str = "loan.csv"):
+def train(csv_path: str = "loan.csv", rf_params: dict | None = None):
+    """
+    Fit, evaluate and save the full model pipeline.
+
+    rf_params : optional overrides merged on top of RF_PARAMS
+                (e.g. the winner of a tuning.py search)
+    """
     print("=" * 60)
     print("  LOAN APPROVAL - RANDOM FOREST TRAINING PIPELINE")
     print("=" * 60)
@@ -117,16 +138,7 @@ def train(csv_path: str = "loan.csv"):
     # --- Full sklearn Pipeline ---
     model_pipeline = Pipeline([
         ("preprocessor", preprocessor),
-        ("classifier", RandomForestClassifier(
-            n_estimators=200,
-            max_depth=8,
-            min_samples_split=4,
-            min_samples_leaf=2,
-            max_features="sqrt",
-            class_weight="balanced",   # handles class imbalance
-            random_state=42,
-            n_jobs=-1,
-        )),
+        ("classifier", RandomForestClassifier(**{**RF_PARAMS, **(rf_params or {})})),
     ])
 
     # --- Train / test split ---
@@ -0,0 +1,359 @@
+"""
+Loan Approval - Random Forest Hyperparameter Tuning
+Time-budgeted successive-halving / Hyperband search over the forest parameters:
+  - Number of trees is the budgeted resource (grows each rung by a factor eta)
+  - Candidates are scored with the same 5-fold stratified F1 as train()
+  - build_preprocessor() is fitted once per fold and cached; only the
+    classifier is refit per candidate
+  - (candidate, fold) fits run across a process pool
+  - Leaderboard is written to artifacts/tuning_leaderboard.json
+  - The winner can be promoted through the normal train() / save path
+
+Run:
+  python tuning.py --budget 300 --workers 4 --strategy hyperband --promote
+"""
+
+import os
+import json
+import math
+import time
+import argparse
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.metrics import f1_score
+
+from pipeline import (
+    build_preprocessor,
+    load_data,
+    preprocess_data,
+    train,
+    ARTIFACTS_DIR,
+    RF_PARAMS,
+)
+
+
+LEADERBOARD_PATH = ARTIFACTS_DIR / "tuning_leaderboard.json"
+
+# Search space sampled uniformly per parameter. n_estimators is not listed:
+# it is the resource that successive halving allocates.
+PARAM_SPACE = {
+    "max_depth":         [4, 6, 8, 10, 12, 16, None],
+    "min_samples_split": [2, 4, 8, 16],
+    "min_samples_leaf":  [1, 2, 4, 8],
+    "max_features":      ["sqrt", "log2", 0.5, None],
+    "class_weight":      ["balanced", "balanced_subsample", None],
+}
+
+
+# ══════════════════════════════════════════════
+# 1.  FOLD CACHE  (preprocessor fitted once per fold)
+# ══════════════════════════════════════════════
+def build_fold_cache(X, y, n_splits: int = 5, random_state: int = 42) -> list[tuple]:
+    """
+    Fit build_preprocessor() on each training fold and return the transformed
+    arrays as [(X_train, y_train, X_val, y_val), ...].
+    Uses the same StratifiedKFold split as train()'s cross-validation.
+    """
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    folds = []
+    for train_idx, val_idx in cv.split(X, y):
+        preprocessor = build_preprocessor()
+        X_tr = preprocessor.fit_transform(X.iloc[train_idx])
+        X_va = preprocessor.transform(X.iloc[val_idx])
+        folds.append((X_tr, y.iloc[train_idx].to_numpy(), X_va, y.iloc[val_idx].to_numpy()))
+    return folds
+
+
+# Per-process copy of the fold cache, set once by the pool initializer so the
+# arrays are shipped to each worker once rather than with every task.
+_FOLDS: list[tuple] = []
+
+
+def _init_worker(folds: list[tuple]):
+    global _FOLDS
+    _FOLDS = folds
+
+
+def _fit_fold(params: dict, n_estimators: int, fold_idx: int) -> tuple[float, float]:
+    """Fit one candidate on one cached fold. Returns (f1, fit_seconds)."""
+    X_tr, y_tr, X_va, y_va = _FOLDS[fold_idx]
+    start = time.perf_counter()
+    rf = RandomForestClassifier(**{
+        **RF_PARAMS,
+        **params,
+        "n_estimators": n_estimators,
+        "n_jobs": 1,   # parallelism comes from the process pool
+    })
+    rf.fit(X_tr, y_tr)
+    score = f1_score(y_va, rf.predict(X_va), zero_division=0)
+    return float(score), time.perf_counter() - start
+
+
+# ══════════════════════════════════════════════
+# 2.  SEARCH
+# ══════════════════════════════════════════════
+def sample_candidates(n: int, rng: np.random.Generator) -> list[dict]:
+    return [
+        {name: values[rng.integers(len(values))] for name, values in PARAM_SPACE.items()}
+        for _ in range(n)
+    ]
+
+
+def hyperband_brackets(max_trees: int, min_trees: int, eta: int, strategy: str) -> list[tuple[int, int]]:
+    """
+    Return [(n_candidates, halvings), ...] for each bracket. Rung i of a bracket
+    fits max_trees // eta ** (halvings - i) trees, so the last rung is always max_trees.
+    'halving' runs only the most exploratory bracket; 'hyperband' runs all of them.
+    """
+    s_max = max(int(math.floor(math.log(max_trees / min_trees, eta) + 1e-9)), 0)
+    brackets = []
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        brackets.append((n, s))
+        if strategy == "halving":
+            break
+    return brackets
+
+
+def _evaluate_rung(pool, candidates, n_estimators, n_folds, deadline):
+    """
+    Score every candidate at n_estimators trees across all folds.
+    Returns (results, timed_out); results only holds fully evaluated candidates.
+    """
+    futures = {
+        pool.submit(_fit_fold, cand["params"], n_estimators, k): (cand["id"], k)
+        for cand in candidates
+        for k in range(n_folds)
+    }
+    scores = {cand["id"]: [] for cand in candidates}
+    seconds = {cand["id"]: 0.0 for cand in candidates}
+
+    pending = set(futures)
+    timed_out = False
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for fut in done:
+            cand_id, _ = futures[fut]
+            score, fit_s = fut.result()
+            scores[cand_id].append(score)
+            seconds[cand_id] += fit_s
+
+    for fut in pending:
+        fut.cancel()
+
+    results = []
+    for cand in candidates:
+        fold_scores = scores[cand["id"]]
+        if len(fold_scores) < n_folds:
+            continue
+        results.append({
+            **cand,
+            "n_estimators": n_estimators,
+            "cv_f1_mean":   round(float(np.mean(fold_scores)), 4),
+            "cv_f1_std":    round(float(np.std(fold_scores)), 4),
+            "fit_seconds":  round(seconds[cand["id"]], 3),
+        })
+    return results, timed_out
+
+
+def score_baseline(folds: list[tuple]) -> dict:
+    """Score the current RF_PARAMS on the cached folds — the bar a winner must beat."""
+    scores = []
+    for X_tr, y_tr, X_va, y_va in folds:
+        rf = RandomForestClassifier(**RF_PARAMS)
+        rf.fit(X_tr, y_tr)
+        scores.append(f1_score(y_va, rf.predict(X_va), zero_division=0))
+    return {
+        "params":       RF_PARAMS,
+        "n_estimators": RF_PARAMS["n_estimators"],
+        "cv_f1_mean":   round(float(np.mean(scores)), 4),
+        "cv_f1_std":    round(float(np.std(scores)), 4),
+    }
+
+
+def _promotion_decision(best: dict, baseline: dict, max_trees: int) -> tuple[bool, str]:
+    if best["n_estimators"] != max_trees:
+        return False, (f"Search did not reach max_trees={max_trees} (best candidate only scored at "
+                       f"{best['n_estimators']} trees). Increase --budget.")
+    if best["cv_f1_mean"] <= baseline["cv_f1_mean"]:
+        return False, (f"Winner CV F1 {best['cv_f1_mean']:.4f} does not beat current RF_PARAMS "
+                       f"CV F1 {baseline['cv_f1_mean']:.4f}.")
+    return True, (f"Winner CV F1 {best['cv_f1_mean']:.4f} beats current RF_PARAMS "
+                  f"CV F1 {baseline['cv_f1_mean']:.4f} at max_trees={max_trees}.")
+
+
+def _save_leaderboard(leaderboard: dict):
+    with open(LEADERBOARD_PATH, "w") as f:
+        json.dump(leaderboard, f, indent=2, default=str)
+    print(f"\n[SAVE]  Leaderboard saved -> {LEADERBOARD_PATH}")
+
+
+def tune(
+    csv_path: str = "loan.csv",
+    budget_seconds: float = 600,
+    workers: int | None = None,
+    strategy: str = "hyperband",
+    max_trees: int = 400,
+    min_trees: int = 25,
+    eta: int = 3,
+    seed: int = 42,
+    promote: bool = False,
+) -> dict:
+    """
+    Run a time-budgeted successive-halving / Hyperband search and write the
+    leaderboard artifact. The winner is the best candidate evaluated at the
+    largest tree count reached. If promote=True it is retrained and saved via
+    train(), replacing the current model artifacts — but only if it was scored
+    at max_trees and beats the current RF_PARAMS on the same folds. The
+    baseline is scored after the search, outside the time budget.
+
+    The budget is checked between fits: fits already running when it expires
+    cannot be interrupted, so the search may overshoot by up to one fit at
+    max_trees. Their results are discarded and tune() returns without waiting
+    for them (the interpreter still joins the pool workers on exit).
+    """
+    if strategy not in ("hyperband", "halving"):
+        raise ValueError(f"Unknown strategy '{strategy}'. Use 'hyperband' or 'halving'.")
+
+    print("=" * 60)
+    print("  LOAN APPROVAL - RANDOM FOREST HYPERPARAMETER TUNING")
+    print("=" * 60)
+
+    started = time.monotonic()
+    deadline = started + budget_seconds
+    rng = np.random.default_rng(seed)
+
+    df = load_data(csv_path)
+    X, y, _, _ = preprocess_data(df)
+    folds = build_fold_cache(X, y)
+    print(f"\n[TUNE]  Cached preprocessor output for {len(folds)} folds.")
+
+    brackets = hyperband_brackets(max_trees, min_trees, eta, strategy)
+    workers = workers or os.cpu_count() or 1
+    print(f"[TUNE]  Strategy: {strategy}  |  Brackets: {len(brackets)}  |  "
+          f"Workers: {workers}  |  Budget: {budget_seconds:.0f}s")
+
+    evaluations = []
+    next_id = 0
+    timed_out = False
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folds,))
+    try:
+        for bracket_idx, (n, halvings) in enumerate(brackets):
+            candidates = []
+            for params in sample_candidates(n, rng):
+                candidates.append({"id": next_id, "bracket": bracket_idx, "params": params})
+                next_id += 1
+
+            for rung in range(halvings + 1):
+                n_trees = max(max_trees // eta ** (halvings - rung), 1)
+                results, timed_out = _evaluate_rung(pool, candidates, n_trees, len(folds), deadline)
+                for res in results:
+                    res["rung"] = rung
+                evaluations.extend(results)
+
+                best_f1 = max((res["cv_f1_mean"] for res in results), default=float("nan"))
+                print(f"[TUNE]  Bracket {bracket_idx} rung {rung}: {len(results)}/{len(candidates)} "
+                      f"candidates @ {n_trees} trees  |  best F1 {best_f1:.4f}")
+
+                keep = len(results) // eta
+                if timed_out or rung == halvings or keep == 0:
+                    break
+                results.sort(key=lambda res: res["cv_f1_mean"], reverse=True)
+                candidates = [
+                    {"id": res["id"], "bracket": res["bracket"], "params": res["params"]}
+                    for res in results[:keep]
+                ]
+
+            if timed_out:
+                print("[TUNE]  Time budget exhausted; stopping search.")
+                break
+    finally:
+        # On timeout, drop queued fits instead of waiting for them
+        pool.shutdown(wait=not timed_out, cancel_futures=True)
+
+    if not evaluations:
+        raise RuntimeError("No candidate finished within the time budget. Increase --budget.")
+
+    # Largest tree count first, then best F1 — scores at a lower resource are
+    # not directly comparable with fully grown forests.
+    evaluations.sort(key=lambda res: (res["n_estimators"], res["cv_f1_mean"]), reverse=True)
+    for rank, res in enumerate(evaluations, start=1):
+        res["rank"] = rank
+    best = evaluations[0]
+    best_params = {**best["params"], "n_estimators": best["n_estimators"]}
+    baseline = score_baseline(folds)
+    should_promote, reason = _promotion_decision(best, baseline, max_trees)
+    if not promote:
+        reason = "Promotion not requested."
+
+    leaderboard = {
+        "generated_at":    datetime.utcnow().isoformat(),
+        "csv_path":        csv_path,
+        "strategy":        strategy,
+        "budget_seconds":  budget_seconds,
+        "elapsed_seconds": round(time.monotonic() - started, 2),
+        "timed_out":       timed_out,
+        "workers":         workers,
+        "max_trees":       max_trees,
+        "min_trees":       min_trees,
+        "eta":             eta,
+        "seed":            seed,
+        "n_candidates":    next_id,
+        "n_evaluations":   len(evaluations),
+        "best_params":     best_params,
+        "best_cv_f1_mean": best["cv_f1_mean"],
+        "best_cv_f1_std":  best["cv_f1_std"],
+        "baseline":        baseline,
+        "promote_requested": promote,
+        "promoted":        False,
+        "promotion_reason": reason,
+        "leaderboard":     evaluations,
+    }
+    _save_leaderboard(leaderboard)
+    print(f"[TUNE]  Best CV F1: {best['cv_f1_mean']:.4f} ± {best['cv_f1_std']:.4f}  |  {best_params}")
+    print(f"[TUNE]  Current RF_PARAMS CV F1: {baseline['cv_f1_mean']:.4f} ± {baseline['cv_f1_std']:.4f}")
+
+    if promote and not should_promote:
+        print(f"\n[TUNE]  Not promoting: {reason}")
+    elif promote:
+        print("\n[TUNE]  Promoting winner through train().")
+        train(csv_path, rf_params=best_params)
+        leaderboard["promoted"] = True
+        _save_leaderboard(leaderboard)
+
+    return leaderboard
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Random Forest hyperparameter tuning")
+    parser.add_argument("--csv", default="loan.csv")
+    parser.add_argument("--budget", type=float, default=600, help="Wall-clock budget in seconds")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--strategy", choices=["hyperband", "halving"], default="hyperband")
+    parser.add_argument("--max-trees", type=int, default=400)
+    parser.add_argument("--min-trees", type=int, default=25)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--promote", action="store_true", help="Retrain and save the winner via train() if it beats RF_PARAMS")
+    args = parser.parse_args()
+
+    tune(
+        csv_path=args.csv,
+        budget_seconds=args.budget,
+        workers=args.workers,
+        strategy=args.strategy,
+        max_trees=args.max_trees,
+        min_trees=args.min_trees,
+        eta=args.eta,
+        seed=args.seed,
+        promote=args.promote,
+    )